@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import Sequence
 
 from .env_maraffa import (
+    CARD_POINTS_F,
     CARD_POINTS_THIRDS,
     CARD_STRENGTH,
+    CARD_STRENGTH_F,
     CARD_SUIT,
-    SUIT_MASKS,
-    team_of,
+    NUM_CARDS,
+    Observation,
+    SUIT_PTS_F,
+    SUIT_STR_F,
+    trick_state,
+    wins_if_played,
 )
 
 
@@ -42,167 +48,138 @@ PARAMS: tuple[float, ...] = (
 )
 
 
-def _current_winning_team(obs: dict) -> int:
-    trick_len = int(obs["trick_len"])
-    if trick_len == 0:
-        return -1
-    trump_suit = int(obs["trump_suit"])
-    lead_suit = int(obs["lead_suit"])
-    trick_cards = list(obs["trick_cards"])
-    trick_players = list(obs["trick_players"])
-
-    has_trump = any(CARD_SUIT[trick_cards[i]] == trump_suit for i in range(trick_len))
-
-    best_i = 0
-    best_s = -1
-    for i in range(trick_len):
-        c = trick_cards[i]
-        suit = CARD_SUIT[c]
-        if has_trump:
-            if suit != trump_suit:
-                continue
-        else:
-            if suit != lead_suit:
-                continue
-        st = CARD_STRENGTH[c]
-        if st > best_s:
-            best_s = st
-            best_i = i
-    return team_of(int(trick_players[best_i]))
-
-
-def _wins_if_played(obs: dict, player: int, card: int) -> bool:
-    trick_len = int(obs["trick_len"])
-    if trick_len == 0:
-        return False
-
-    trump_suit = int(obs["trump_suit"])
-    lead_suit = int(obs["lead_suit"])
-    trick_cards = list(obs["trick_cards"])
-    trick_players = list(obs["trick_players"])
-
-    cards = trick_cards[:trick_len] + [card]
-    players = trick_players[:trick_len] + [player]
-
-    has_trump = any(CARD_SUIT[c] == trump_suit for c in cards)
-
-    best_i = 0
-    best_s = -1
-    for i, c in enumerate(cards):
-        suit = CARD_SUIT[c]
-        if has_trump:
-            if suit != trump_suit:
-                continue
-        else:
-            if suit != lead_suit:
-                continue
-        st = CARD_STRENGTH[c]
-        if st > best_s:
-            best_s = st
-            best_i = i
-    return int(players[best_i]) == int(player)
-
-
 @dataclass
 class Agent:
     name: str = "heuristic_v0"
     params: tuple[float, ...] = PARAMS
 
-    def choose_trump(self, obs: dict, legal: List[int]) -> int:
+    def __post_init__(self) -> None:
+        # params are fixed for the agent's lifetime, so the per-card part of
+        # every linear score (points/strength terms) is folded into 40-entry
+        # tables once; play_card only adds the per-decision terms on top.
+        p = self.params
+        cards = range(NUM_CARDS)
+        cp = CARD_POINTS_THIRDS
+        cst = CARD_STRENGTH
+        self._take_partner_base = tuple(p[13] * cp[c] + p[14] * cst[c] for c in cards)
+        self._dump_partner_base = tuple(p[16] * cp[c] + p[17] * cst[c] for c in cards)
+        self._take_base = tuple(p[19] * cp[c] + p[20] * cst[c] for c in cards)
+        self._dump_base = tuple(p[23] * cp[c] + p[24] * cst[c] for c in cards)
+        # Lead scores also fold in the trump terms: _lead_tables[trump * 2 + endg][c]
+        # (endg = trick_index >= 7), so a lead only adds the suit-length term.
+        lead_base = tuple(p[6] * CARD_POINTS_F[c] + p[7] * CARD_STRENGTH_F[c] for c in cards)
+        tables = []
+        for trump in range(4):
+            for endg in (0.0, 1.0):
+                row = []
+                for c in cards:
+                    tr = 1.0 if CARD_SUIT[c] == trump else 0.0
+                    row.append(lead_base[c] - p[8] * tr + p[9] * tr * endg)
+                tables.append(tuple(row))
+        self._lead_tables = tuple(tables)
+
+    def choose_trump(self, obs: Observation, legal: Sequence[int]) -> int:
         # legal is expected to be [0,1,2,3]
-        hand = int(obs["hand_mask"])
+        hand = obs.hand_mask
         p = self.params
-        best_s = int(legal[0])
+        best_s = legal[0]
         best_v = -1e18
         for s in legal:
-            m = hand & SUIT_MASKS[s]
-            cnt = m.bit_count()
-            pts = 0.0
-            strn = 0.0
             base = s * 10
-            has3 = (hand >> (base + 0)) & 1
-            has2 = (hand >> (base + 1)) & 1
-            hasA = (hand >> (base + 2)) & 1
-            mm = m
-            while mm:
-                lsb = mm & -mm
-                c = lsb.bit_length() - 1
-                pts += CARD_POINTS_THIRDS[c] / 3.0
-                strn += CARD_STRENGTH[c] / 9.0
-                mm ^= lsb
+            rank_bits = (hand >> base) & 0x3FF
+            cnt = rank_bits.bit_count()
+            pts = SUIT_PTS_F[rank_bits]
+            strn = SUIT_STR_F[rank_bits]
+            has3 = rank_bits & 1
+            has2 = (rank_bits >> 1) & 1
+            hasA = (rank_bits >> 2) & 1
             v = p[0] * cnt + p[1] * pts + p[2] * strn + p[3] * has3 + p[4] * has2 + p[5] * hasA
             if v > best_v:
                 best_v = v
                 best_s = s
-        return int(best_s)
+        return best_s
 
-    def play_card(self, obs: dict, legal: List[int]) -> int:
+    def play_card(self, obs: Observation, legal: Sequence[int]) -> int:
         if len(legal) == 1:
-            return int(legal[0])
+            return legal[0]
         p = self.params
+        cs = CARD_SUIT
 
-        player = int(obs["player"])
-        trump_suit = int(obs["trump_suit"])
-        trick_len = int(obs["trick_len"])
-        trick_index = int(obs["trick_index"])
-        hand = int(obs["hand_mask"])
+        player = obs.player
+        trump_suit = obs.trump_suit
+        trick_len = obs.trick_len
+        trick_index = obs.trick_index
 
         if trick_len == 0:
-            endg = 1.0 if trick_index >= 7 else 0.0
-            best = int(legal[0])
+            suit_counts = obs.hand_suit_counts
+            table = self._lead_tables[trump_suit * 2 + (trick_index >= 7)]
+            p10 = p[10]
+            best = legal[0]
             best_sc = -1e18
             for c in legal:
-                tr = 1.0 if CARD_SUIT[c] == trump_suit else 0.0
-                sc = p[6] * (CARD_POINTS_THIRDS[c] / 3.0) + p[7] * (CARD_STRENGTH[c] / 9.0) - p[8] * tr + p[9] * tr * endg
-                suit_cnt = (hand & SUIT_MASKS[CARD_SUIT[c]]).bit_count()
-                sc += p[10] * (suit_cnt / 10.0)
+                sc = table[c]
+                sc += p10 * (suit_counts[cs[c]] / 10.0)
                 if sc > best_sc:
                     best_sc = sc
                     best = c
-            return int(best)
+            return best
 
-        team = team_of(player)
-        partner_winning = _current_winning_team(obs) == team
+        team = player & 1
+        state = trick_state(obs)
+        partner_winning = (state[0] & 1) == team
 
+        cpf = CARD_POINTS_F
         points_on_table = 0.0
-        trick_cards = list(obs["trick_cards"])
+        trick_cards = obs.trick_cards
         for i in range(trick_len):
-            c = trick_cards[i]
-            if c >= 0:
-                points_on_table += CARD_POINTS_THIRDS[c] / 3.0
+            points_on_table += cpf[trick_cards[i]]
 
-        winners = [c for c in legal if _wins_if_played(obs, player, c)]
         if partner_winning:
-            if winners and (points_on_table >= p[11] or trick_index >= p[12]):
-                return int(
-                    min(
-                        winners,
-                        key=lambda c: (p[13] * CARD_POINTS_THIRDS[c] + p[14] * CARD_STRENGTH[c] - p[15] * points_on_table),
-                    )
-                )
-            return int(
-                min(
-                    legal,
-                    key=lambda c: (p[16] * CARD_POINTS_THIRDS[c] + p[17] * CARD_STRENGTH[c] + p[18] * (1 if CARD_SUIT[c] == trump_suit else 0)),
-                )
-            )
+            # Only build winners when over-taking the partner is on the cards.
+            if points_on_table >= p[11] or trick_index >= p[12]:
+                winners = [c for c in legal if wins_if_played(state, c)]
+            else:
+                winners = None
+            if winners:
+                base = self._take_partner_base
+                best = winners[0]
+                best_k = 1e18
+                for c in winners:
+                    k = base[c]  # - p15 * points_on_table is constant across winners
+                    if k < best_k:
+                        best_k = k
+                        best = c
+                return best
+            base = self._dump_partner_base
+            p18 = p[18]
+            best = legal[0]
+            best_k = 1e18
+            for c in legal:
+                k = base[c] + (p18 if cs[c] == trump_suit else 0.0)
+                if k < best_k:
+                    best_k = k
+                    best = c
+            return best
 
+        winners = [c for c in legal if wins_if_played(state, c)]
         if winners:
-            return int(
-                min(
-                    winners,
-                    key=lambda c: (
-                        p[19] * CARD_POINTS_THIRDS[c]
-                        + p[20] * CARD_STRENGTH[c]
-                        + p[21] * (1 if CARD_SUIT[c] == trump_suit else 0)
-                        - p[22] * points_on_table
-                    ),
-                )
-            )
-        return int(
-            min(
-                legal,
-                key=lambda c: (p[23] * CARD_POINTS_THIRDS[c] + p[24] * CARD_STRENGTH[c] + p[25] * (1 if CARD_SUIT[c] == trump_suit else 0)),
-            )
-        )
-
+            base = self._take_base
+            p21 = p[21]
+            best = winners[0]
+            best_k = 1e18
+            for c in winners:
+                k = base[c] + (p21 if cs[c] == trump_suit else 0.0)
+                if k < best_k:
+                    best_k = k
+                    best = c
+            return best
+        base = self._dump_base
+        p25 = p[25]
+        best = legal[0]
+        best_k = 1e18
+        for c in legal:
+            k = base[c] + (p25 if cs[c] == trump_suit else 0.0)
+            if k < best_k:
+                best_k = k
+                best = c
+        return best
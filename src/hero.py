@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import functools
 from dataclasses import dataclass
+from typing import Mapping, Sequence
 
 from .env_maraffa import (
+    CARD_POINTS_F,
     CARD_POINTS_THIRDS,
     CARD_STRENGTH,
+    CARD_STRENGTH_F,
     CARD_SUIT,
     MARAFFA_MASKS,
-    SUIT_MASKS,
+    SUIT_PTS_F,
+    SUIT_STR_F,
     MaraffaEnv,
-    team_of,
+    Observation,
+    trick_state,
+    wins_if_played,
 )
 
 # IMPORTANT: This agent is purely heuristic (no search/MC, no teammate info sharing).
@@ -17,154 +24,92 @@ from .env_maraffa import (
 # In this file we implement only BASE features + linear scoring.
 
 
-def _current_winner_team(obs: dict) -> int:
-    tl = int(obs["trick_len"])
-    if tl == 0:
-        return -1
-    trump = int(obs["trump_suit"])
-    lead = int(obs["lead_suit"])
-    cards = list(obs["trick_cards"])
-    players = list(obs["trick_players"])
-
-    has_trump = any(CARD_SUIT[int(cards[i])] == trump for i in range(tl))
-    best_i = 0
-    best_s = -1
-    for i in range(tl):
-        c = int(cards[i])
-        suit = CARD_SUIT[c]
-        if has_trump:
-            if suit != trump:
-                continue
-        else:
-            if suit != lead:
-                continue
-        st = CARD_STRENGTH[c]
-        if st > best_s:
-            best_s = st
-            best_i = i
-    return team_of(int(players[best_i]))
-
-
-def _wins_if_played(obs: dict, player: int, card: int) -> bool:
-    tl = int(obs["trick_len"])
-    if tl == 0:
-        return False
-    trump = int(obs["trump_suit"])
-    lead = int(obs["lead_suit"])
-    cards = [int(x) for x in list(obs["trick_cards"])[:tl]] + [int(card)]
-
-    has_trump = any(CARD_SUIT[c] == trump for c in cards)
-    best_s = -1
-    best_idx = 0
-    for i, c in enumerate(cards):
-        suit = CARD_SUIT[c]
-        if has_trump:
-            if suit != trump:
-                continue
-        else:
-            if suit != lead:
-                continue
-        st = CARD_STRENGTH[c]
-        if st > best_s:
-            best_s = st
-            best_idx = i
-
-    # who played best_idx?
-    players = [int(x) for x in list(obs["trick_players"])[:tl]] + [int(player)]
-    return players[best_idx] == int(player)
-
-
-def _public_void_suits(obs: dict) -> list[list[bool]]:
-    void = [[False] * 4 for _ in range(4)]
-    for lead_suit, players, cards in obs.get("trick_history", []):
-        ls = int(lead_suit)
-        for p, c in zip(players, cards):
-            p = int(p)
-            c = int(c)
-            if c < 0:
-                continue
-            if CARD_SUIT[c] != ls:
-                void[p][ls] = True
-
-    tl = int(obs["trick_len"])
-    if tl > 0:
-        ls = int(obs["lead_suit"])
-        players = list(obs["trick_players"])
-        cards = list(obs["trick_cards"])
-        for i in range(tl):
-            p = int(players[i])
-            c = int(cards[i])
-            if c >= 0 and CARD_SUIT[c] != ls:
-                void[p][ls] = True
-    return void
-
-
-def _seen_cards_mask(obs: dict) -> int:
-    m = int(obs["played_mask"])
-    for c in list(obs["trick_cards"]):
-        c = int(c)
-        if c >= 0:
-            m |= 1 << c
-    return m
+def _public_void_suits(obs: Observation) -> list[int]:
+    """Per player, a 4-bit mask of the suits they are publicly known void in."""
+    vb = obs.void_bits
+    return [vb & 0xF, (vb >> 4) & 0xF, (vb >> 8) & 0xF, (vb >> 12) & 0xF]
 
 
-def _suit_seen_count(obs: dict, suit: int) -> int:
-    seen = _seen_cards_mask(obs)
-    base = suit * 10
-    suit_mask = ((1 << 10) - 1) << base
-    return int(((seen & suit_mask) >> base).bit_count())
+def _seen_cards_mask(obs: Observation) -> int:
+    m = obs.played_mask
+    cards = obs.trick_cards
+    for i in range(obs.trick_len):
+        m |= 1 << cards[i]
+    return m
 
 
-def _high_cards_seen_fraction(obs: dict, suit: int) -> float:
-    seen = _seen_cards_mask(obs)
-    base = suit * 10
-    top = [base + 0, base + 1, base + 2]
-    return sum(1 for c in top if (seen >> c) & 1) / 3.0
+def _suit_seen_count_from_mask(seen: int, suit: int) -> int:
+    return ((seen >> (suit * 10)) & 0x3FF).bit_count()
 
 
-def _void_risk_for_lead(obs: dict, suit: int) -> float:
-    void = _public_void_suits(obs)
-    me = int(obs["player"])
-    opps = [(me + 1) & 3, (me + 3) & 3]
-    return float(sum(1 for o in opps if void[o][suit]))
+def _high_cards_seen_fraction_from_mask(seen: int, suit: int) -> float:
+    # Rank indices 0..2 are the 3, 2 and A of the suit.
+    return ((seen >> (suit * 10)) & 0x7).bit_count() / 3.0
 
 
-def _points_on_table(obs: dict) -> float:
-    tl = int(obs["trick_len"])
+def _points_on_table(obs: Observation) -> float:
+    tl = obs.trick_len
     if tl == 0:
         return 0.0
     pts = 0.0
-    cards = list(obs["trick_cards"])
+    cards = obs.trick_cards
     for i in range(tl):
-        c = int(cards[i])
-        if c >= 0:
-            pts += CARD_POINTS_THIRDS[c] / 3.0
-    return float(pts)
-
-
-def _trump_count(hand_mask: int, trump_suit: int) -> int:
-    if trump_suit < 0:
-        return 0
-    return int((hand_mask & SUIT_MASKS[trump_suit]).bit_count())
-
-
-def _max_trump_strength(hand_mask: int, trump_suit: int) -> int:
-    if trump_suit < 0:
-        return -1
-    m = hand_mask & SUIT_MASKS[trump_suit]
-    if not m:
-        return -1
-    best = -1
-    mm = m
-    while mm:
-        lsb = mm & -mm
-        c = lsb.bit_length() - 1
-        best = max(best, CARD_STRENGTH[c])
-        mm ^= lsb
-    return int(best)
-
-
-@dataclass
+        pts += CARD_POINTS_F[cards[i]]
+    return pts
+
+
+@functools.lru_cache(maxsize=65536)
+def _score_trump(
+    hand: int,
+    played_mask: int,
+    void_bits: int,
+    me: int,
+    legal: tuple[int, ...],
+    weights: tuple[float, float, float, float, float, float],
+) -> int:
+    """Best trump suit for HeroAgent.choose_trump.
+
+    Pure in its arguments (played_mask and void_bits are the obs fields of the
+    same name; weights are the six trump weights), so results are memoized:
+    replayed deals during tuning/paired tests hit the cache.
+    """
+    w_cnt, w_pts, w_str, w_maraffa, w_void_bonus, w_seen_high = weights
+    # Per-player 4-bit void masks (bit s = void in suit s), as in _public_void_suits.
+    opp1 = (void_bits >> (((me + 1) & 3) * 4)) & 0xF
+    opp2 = (void_bits >> (((me + 3) & 3) * 4)) & 0xF
+    partner_void = (void_bits >> ((me ^ 2) * 4)) & 0xF
+
+    best_s = legal[0]
+    best_v = -1e18
+    for s in legal:
+        base = s * 10
+        rank_bits = (hand >> base) & 0x3FF
+        cnt = rank_bits.bit_count()
+        pts = SUIT_PTS_F[rank_bits]
+        strn = SUIT_STR_F[rank_bits]
+
+        has_maraffa = 1.0 if (hand & MARAFFA_MASKS[s]) == MARAFFA_MASKS[s] else 0.0
+
+        void_bonus = ((opp1 >> s) & 1) + ((opp2 >> s) & 1) + 0.25 * ((partner_void >> s) & 1)
+
+        # No trick is in progress during the trump phase, so played_mask is the seen mask.
+        seen_high = _high_cards_seen_fraction_from_mask(played_mask, s)
+
+        v = (
+            w_cnt * cnt
+            + w_pts * pts
+            + w_str * strn
+            + w_maraffa * has_maraffa
+            + w_void_bonus * void_bonus
+            + w_seen_high * seen_high
+        )
+        if v > best_v:
+            best_v = v
+            best_s = s
+    return best_s
+
+
+@dataclass(slots=True)
 class HeroAgent:
     """heuristic_v3_interactions: linear model with BASE + INTERACTION features.
 
@@ -222,193 +167,160 @@ class HeroAgent:
     wi_take_x_trumpcount: float = 0.0
     wi_dump_x_trumpcount: float = 0.0
 
-    def choose_trump(self, obs: dict, legal: list[int]) -> int:
-        hand = int(obs["hand_mask"])
-        void = _public_void_suits(obs)
-        me = int(obs["player"])
-        partner = me ^ 2
-
-        best_s = int(legal[0])
-        best_v = -1e18
-        for s in legal:
-            m = hand & SUIT_MASKS[s]
-            cnt = m.bit_count()
-
-            pts = 0.0
-            strn = 0.0
-            mm = m
-            while mm:
-                lsb = mm & -mm
-                c = lsb.bit_length() - 1
-                pts += CARD_POINTS_THIRDS[c] / 3.0
-                strn += CARD_STRENGTH[c] / 9.0
-                mm ^= lsb
-
-            has_maraffa = 1.0 if (hand & MARAFFA_MASKS[s]) == MARAFFA_MASKS[s] else 0.0
-
-            void_bonus = 0.0
-            for opp in ((me + 1) & 3, (me + 3) & 3):
-                if void[opp][s]:
-                    void_bonus += 1.0
-            if void[partner][s]:
-                void_bonus += 0.25
-
-            seen_high = _high_cards_seen_fraction(obs, s)
-
-            v = (
-                self.w_cnt * cnt
-                + self.w_pts * pts
-                + self.w_str * strn
-                + self.w_maraffa * has_maraffa
-                + self.w_void_bonus * void_bonus
-                + self.w_seen_high * seen_high
-            )
-            if v > best_v:
-                best_v = v
-                best_s = int(s)
-        return int(best_s)
-
-    def play_card(self, obs: dict, legal: list[int]) -> int:
+    def set_weights(self, weights: Mapping[str, float]) -> None:
+        """Overwrite weights in place, e.g. to reuse one agent across tuning candidates."""
+        for k, v in weights.items():
+            setattr(self, k, v)
+
+    def choose_trump(self, obs: Observation, legal: Sequence[int]) -> int:
+        weights = (self.w_cnt, self.w_pts, self.w_str, self.w_maraffa, self.w_void_bonus, self.w_seen_high)
+        return _score_trump(
+            obs.hand_mask,
+            obs.played_mask,
+            obs.void_bits,
+            obs.player,
+            tuple(legal),
+            weights,
+        )
+
+    def play_card(self, obs: Observation, legal: Sequence[int]) -> int:
         if len(legal) == 1:
-            return int(legal[0])
+            return legal[0]
 
-        me = int(obs["player"])
-        trump = int(obs["trump_suit"])
-        trick_len = int(obs["trick_len"])
-        trick_index = int(obs["trick_index"])
-        hand = int(obs["hand_mask"])
+        me = obs.player
+        trump = obs.trump_suit
+        trick_len = obs.trick_len
+        trick_index = obs.trick_index
 
         # --- Lead
         if trick_len == 0:
             endg = 1.0 if trick_index >= 7 else 0.0
 
             void = _public_void_suits(obs)
-            opps = [(me + 1) & 3, (me + 3) & 3]
-            opp_void_total = 0
-            for o in opps:
-                opp_void_total += sum(1 for s in range(4) if void[o][s])
-            have_trump = (hand & SUIT_MASKS[trump]) != 0
-            tr_cnt = _trump_count(hand, trump)
-
-            best = int(legal[0])
-            best_sc = -1e18
-            for c in legal:
-                s = CARD_SUIT[c]
+            opp1, opp2 = void[(me + 1) & 3], void[(me + 3) & 3]
+            opp_void_total = opp1.bit_count() + opp2.bit_count()
+            # Void risk depends only on the suit: build it once, not per card.
+            void_risk_by_suit = [float(((opp1 >> s) & 1) + ((opp2 >> s) & 1)) for s in range(4)]
+            suit_counts = obs.hand_suit_counts
+            tr_cnt = suit_counts[trump]
+            have_trump = tr_cnt > 0
+            seen = _seen_cards_mask(obs)
+            suit_seen_cnt = [_suit_seen_count_from_mask(seen, s) for s in range(4)]
+            suit_high_seen = [_high_cards_seen_fraction_from_mask(seen, s) for s in range(4)]
+
+            # Weights read once per decision (LOAD_FAST in the loop below).
+            w_pts = self.w_lead_pts
+            w_str = self.w_lead_str
+            w_trump_pen = self.w_lead_trump_penalty
+            w_suit_len = self.w_lead_suit_len
+            w_seen_high = self.w_lead_seen_high
+            w_void_risk = self.w_lead_void_risk
+            w_suit_seen = self.w_lead_suit_seen
+            w_draw_trump = self.w_lead_draw_trump
+            w_trump_cnt = self.w_lead_trump_count
+            wi_voidrisk = self.wi_lead_voidrisk_x_not_endg
+            wi_oppvoid = self.wi_lead_trump_x_oppvoid
+            wi_nontrump = self.wi_lead_nontrump_x_voidrisk
+
+            # Every term except points/strength depends only on the suit, so the
+            # terms are computed once per suit. Each card still adds them one by
+            # one, in the original order: float addition is not associative, and
+            # pre-summing them can flip exact ties between leads. Zero terms are
+            # dropped (adding 0.0 never changes a sum).
+            mid = 1.0 - endg
+            draw = opp_void_total / 8.0
+            suit_terms = []
+            for s in range(4):
                 tr = 1.0 if s == trump else 0.0
-                suit_cnt = (hand & SUIT_MASKS[s]).bit_count()
-                seen_high = _high_cards_seen_fraction(obs, s)
-                seen_cnt = _suit_seen_count(obs, s)
-                void_risk = _void_risk_for_lead(obs, s)
-
-                sc = 0.0
-                sc += self.w_lead_pts * (CARD_POINTS_THIRDS[c] / 3.0)
-                sc += self.w_lead_str * (CARD_STRENGTH[c] / 9.0)
-                sc -= self.w_lead_trump_penalty * tr * (1.0 - endg)
-                sc += self.w_lead_suit_len * (suit_cnt / 10.0)
-                sc += self.w_lead_seen_high * seen_high
-                sc -= self.w_lead_void_risk * void_risk * (1.0 - endg)
-                sc += self.w_lead_suit_seen * (seen_cnt / 10.0)
-
-                if have_trump and tr > 0.0:
-                    sc += self.w_lead_draw_trump * (opp_void_total / 8.0) * (1.0 - endg)
-
-                # New base feature: if we have many trumps, drawing trump early is less costly.
+                void_risk = void_risk_by_suit[s]
+                terms = [
+                    -(w_trump_pen * tr * mid),
+                    w_suit_len * (suit_counts[s] / 10.0),
+                    w_seen_high * suit_high_seen[s],
+                    -(w_void_risk * void_risk * mid),
+                    w_suit_seen * (suit_seen_cnt[s] / 10.0),
+                ]
                 if tr > 0.0:
-                    sc += self.w_lead_trump_count * (tr_cnt / 10.0)
-
+                    if have_trump:
+                        terms.append(w_draw_trump * draw * mid)
+                    # New base feature: if we have many trumps, drawing trump early is less costly.
+                    terms.append(w_trump_cnt * (tr_cnt / 10.0))
                 # --- INTERACTIONS (lead)
                 # Penalize void risk strongly in midgame.
-                sc -= self.wi_lead_voidrisk_x_not_endg * void_risk * (1.0 - endg)
-                # If leading trump and opponents are void in many suits, draw trump is more valuable.
+                terms.append(-(wi_voidrisk * void_risk * mid))
                 if tr > 0.0:
-                    sc += self.wi_lead_trump_x_oppvoid * (opp_void_total / 8.0) * (1.0 - endg)
+                    # If leading trump and opponents are void in many suits, draw trump is more valuable.
+                    terms.append(wi_oppvoid * draw * mid)
                 else:
                     # Non-trump lead gets worse when void risk is high.
-                    sc -= self.wi_lead_nontrump_x_voidrisk * void_risk * (1.0 - endg)
+                    terms.append(-(wi_nontrump * void_risk * mid))
+                suit_terms.append(tuple(t for t in terms if t != 0.0))
 
+            best = legal[0]
+            best_sc = -1e18
+            for c in legal:
+                sc = w_pts * CARD_POINTS_F[c]
+                sc += w_str * CARD_STRENGTH_F[c]
+                for t in suit_terms[CARD_SUIT[c]]:
+                    sc += t
                 if sc > best_sc:
                     best_sc = sc
-                    best = int(c)
-            return int(best)
+                    best = c
+            return best
 
         # --- Following
-        team = team_of(me)
-        partner_winning = _current_winner_team(obs) == team
+        team = me & 1
+        state = trick_state(obs)
+        partner_winning = (state[0] & 1) == team
 
         pts_table = _points_on_table(obs)
-        winners = [c for c in legal if _wins_if_played(obs, me, c)]
-        pos_in_trick = float(trick_len)  # 1..3 while following
-        tr_cnt = _trump_count(hand, trump)
-        mx_tr = _max_trump_strength(hand, trump)
+
+        cs = CARD_SUIT
+        cst = CARD_STRENGTH
+        cp = CARD_POINTS_THIRDS
 
         if partner_winning:
-            if winners and pts_table >= 1.5:
-                return int(
-                    min(
-                        winners,
-                        key=lambda c: (
-                            self.w_follow_win_take_pts * CARD_POINTS_THIRDS[c]
-                            + self.w_follow_win_low * CARD_STRENGTH[c]
-                            - 0.8 * pts_table
-                            # INTERACTIONS (taking)
-                            - self.wi_take_x_points * pts_table
-                            - self.wi_take_x_pos * pos_in_trick
-                            - self.wi_take_x_trumpcount * (tr_cnt / 10.0)
-                        ),
-                    )
-                )
-            return int(
-                min(
-                    legal,
-                    key=lambda c: (
-                        self.w_follow_dump_low * CARD_POINTS_THIRDS[c]
-                        + 0.9 * CARD_STRENGTH[c]
-                        + self.w_follow_dump_trump_penalty * (1 if CARD_SUIT[c] == trump else 0)
-                        + self.w_follow_points_on_table * pts_table
-                        + self.w_follow_pos_in_trick * pos_in_trick
-                        + self.w_follow_trump_count * (tr_cnt / 10.0)
-                        + self.w_follow_max_trump * (mx_tr / 9.0 if mx_tr >= 0 else 0.0)
-                        # INTERACTIONS (dumping)
-                        + self.wi_dump_x_points * pts_table
-                        + self.wi_dump_x_pos * pos_in_trick
-                        + self.wi_dump_x_trumpcount * (tr_cnt / 10.0)
-                    ),
-                )
-            )
+            # winners only matter when the table is worth over-taking the partner.
+            winners = [c for c in legal if wins_if_played(state, c)] if pts_table >= 1.5 else None
+            if winners:
+                w_pts, w_low = self.w_follow_win_take_pts, self.w_follow_win_low
+                best = winners[0]
+                best_k = 1e18
+                for c in winners:
+                    # Table-points/position/trump-count terms (and their
+                    # interactions) are the same for every candidate, so
+                    # they cannot change the argmin and are left out.
+                    k = w_pts * cp[c] + w_low * cst[c]
+                    if k < best_k:
+                        best_k = k
+                        best = c
+                return best
+            w_low, w_trump_pen = self.w_follow_dump_low, self.w_follow_dump_trump_penalty
+            best = legal[0]
+            best_k = 1e18
+            for c in legal:
+                k = w_low * cp[c] + 0.9 * cst[c] + (w_trump_pen if cs[c] == trump else 0.0)
+                if k < best_k:
+                    best_k = k
+                    best = c
+            return best
 
+        winners = [c for c in legal if wins_if_played(state, c)]
         if winners:
-            return int(
-                min(
-                    winners,
-                    key=lambda c: (
-                        1.0 * CARD_POINTS_THIRDS[c]
-                        + 1.2 * CARD_STRENGTH[c]
-                        + 1.1 * (1 if CARD_SUIT[c] == trump else 0)
-                        - 1.0 * pts_table
-                        - 0.2 * pos_in_trick
-                        # INTERACTIONS (taking)
-                        - self.wi_take_x_points * pts_table
-                        - self.wi_take_x_pos * pos_in_trick
-                        - self.wi_take_x_trumpcount * (tr_cnt / 10.0)
-                    ),
-                )
-            )
-
-        return int(
-            min(
-                legal,
-                key=lambda c: (
-                    1.0 * CARD_POINTS_THIRDS[c]
-                    + 1.0 * CARD_STRENGTH[c]
-                    + 1.0 * (1 if CARD_SUIT[c] == trump else 0)
-                    + self.w_follow_points_on_table * pts_table
-                    + self.w_follow_pos_in_trick * pos_in_trick
-                    + self.w_follow_trump_count * (tr_cnt / 10.0)
-                    + self.w_follow_max_trump * (mx_tr / 9.0 if mx_tr >= 0 else 0.0)
-                    # INTERACTIONS (dumping)
-                    + self.wi_dump_x_points * pts_table
-                    + self.wi_dump_x_pos * pos_in_trick
-                    + self.wi_dump_x_trumpcount * (tr_cnt / 10.0)
-                ),
-            )
-        )
+            best = winners[0]
+            best_k = 1e18
+            for c in winners:
+                k = cp[c] + 1.2 * cst[c] + (1.1 if cs[c] == trump else 0.0)
+                if k < best_k:
+                    best_k = k
+                    best = c
+            return best
+
+        best = legal[0]
+        best_k = 1e18
+        for c in legal:
+            k = cp[c] + cst[c] + (1.0 if cs[c] == trump else 0.0)
+            if k < best_k:
+                best_k = k
+                best = c
+        return best
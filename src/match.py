@@ -3,9 +3,10 @@ from __future__ import annotations
 import argparse
 import random
 import time
+from typing import Sequence
 
 from .agent import Agent
-from .env_maraffa import MaraffaEnv
+from .env_maraffa import MaraffaEnv, Observation
 
 
 class RandomAgent:
@@ -14,11 +15,11 @@ class RandomAgent:
     def __init__(self, seed: int = 0):
         self.rng = random.Random(seed)
 
-    def choose_trump(self, obs: dict, legal: list[int]) -> int:
-        return int(self.rng.choice(legal))
+    def choose_trump(self, obs: Observation, legal: Sequence[int]) -> int:
+        return self.rng.choice(legal)
 
-    def play_card(self, obs: dict, legal: list[int]) -> int:
-        return int(self.rng.choice(legal))
+    def play_card(self, obs: Observation, legal: Sequence[int]) -> int:
+        return self.rng.choice(legal)
 
 
 def play_hand(env: MaraffaEnv, agent_even, agent_odd, seed: int) -> tuple[float, float]:
@@ -30,6 +31,10 @@ def play_hand_from_state(env: MaraffaEnv, agent_even, agent_odd) -> tuple[float,
     """Play from current env state (already reset)."""
     while not env.done:
         p = env.current_player
+        forced = env.forced_action(p)
+        if forced >= 0:
+            env.apply(forced)
+            continue
         policy = agent_even if (p & 1) == 0 else agent_odd
         legal = env.legal_actions(p)
         obs = env.obs(player=p)
@@ -37,7 +42,7 @@ def play_hand_from_state(env: MaraffaEnv, agent_even, agent_odd) -> tuple[float,
             act = policy.choose_trump(obs, legal)
         else:
             act = policy.play_card(obs, legal)
-        env.step(act)
+        env.apply(act)
     # Convert thirds to points for reporting
     return env.scores_thirds[0] / 3.0, env.scores_thirds[1] / 3.0
 
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from .env_maraffa import MaraffaEnv
+from .match import play_hand, play_hand_from_state
+
+# Independent games are embarrassingly parallel: each worker process builds its
+# own env and plays whole hands. Agents are shipped to workers by pickling, so
+# they must be plain picklable objects (the dataclass agents are).
+#
+# Every n_workers/workers argument defaults to DEFAULT_WORKERS (serial, no pool);
+# values < 1 mean one process per CPU (see resolve_workers).
+DEFAULT_WORKERS = 1
+
+
+def resolve_workers(n_workers: int) -> int:
+    """Number of processes to use for n_workers (< 1 means os.cpu_count())."""
+    if n_workers < 1:
+        return os.cpu_count() or 1
+    return int(n_workers)
+
+
+def play_one(seed: int, agent_even, agent_odd) -> tuple[float, float]:
+    """Play one hand dealt from `seed` with a fresh env; returns (team0, team1) points."""
+    env = MaraffaEnv(seed=seed)
+    return play_hand(env, agent_even, agent_odd, seed)
+
+
+def play_paired_deal(
+    seed: int, agent_even, agent_odd, env: MaraffaEnv | None = None
+) -> tuple[tuple[float, float], tuple[float, float]]:
+    """Play deal_from_seed(seed) and its 1-seat rotation; returns both (team0, team1) results.
+
+    Pass `env` to reuse one env across deals when playing serially.
+    """
+    hands, declarer = MaraffaEnv.deal_from_seed(seed)
+    if env is None:
+        env = MaraffaEnv(seed=seed)
+    env.reset_from(hands, declarer)
+    first = play_hand_from_state(env, agent_even, agent_odd)
+    env.reset_from([hands[(p - 1) & 3] for p in range(4)], (declarer + 1) & 3)
+    second = play_hand_from_state(env, agent_even, agent_odd)
+    return first, second
+
+
+def _map_seeds(fn, seeds: range, workers: int, executor: Executor | None = None) -> list:
+    # `workers` is already resolved. An existing executor is reused (workers then
+    # only sizes the chunks); otherwise 1 plays in-process and more starts a pool.
+    if executor is None and workers == 1:
+        return [fn(s) for s in seeds]
+    chunksize = max(1, len(seeds) // (4 * workers))
+    if executor is not None:
+        return list(executor.map(fn, seeds, chunksize=chunksize))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(fn, seeds, chunksize=chunksize))
+
+
+def run_batch(
+    agent_even,
+    agent_odd,
+    *,
+    n_games: int,
+    seed: int,
+    n_workers: int = DEFAULT_WORKERS,
+) -> list[tuple[float, float]]:
+    """Play hands for seeds seed..seed+n_games-1, spread over n_workers processes.
+
+    Results are returned in seed order, identical to playing them serially.
+    """
+    seeds = range(int(seed), int(seed) + int(n_games))
+    fn = functools.partial(play_one, agent_even=agent_even, agent_odd=agent_odd)
+    return _map_seeds(fn, seeds, resolve_workers(n_workers))
+
+
+def run_paired_batch(
+    agent_even,
+    agent_odd,
+    *,
+    n_deals: int,
+    seed: int,
+    n_workers: int = DEFAULT_WORKERS,
+    executor: Executor | None = None,
+) -> list[tuple[tuple[float, float], tuple[float, float]]]:
+    """play_paired_deal for seeds seed..seed+n_deals-1, spread over n_workers processes.
+
+    Same ordering as run_batch; the serial path reuses one env. Pass `executor`
+    (with n_workers set to its size) to run on an existing pool instead of
+    starting one per call.
+    """
+    seeds = range(int(seed), int(seed) + int(n_deals))
+    workers = resolve_workers(n_workers)
+    if executor is None and workers == 1:
+        env = MaraffaEnv(seed=seed)
+        return [play_paired_deal(s, agent_even, agent_odd, env) for s in seeds]
+    fn = functools.partial(play_paired_deal, agent_even=agent_even, agent_odd=agent_odd)
+    return _map_seeds(fn, seeds, workers, executor)
@@ -9,6 +9,8 @@ Notes:
 - Uses paired testing (2 hands per deal with 1-seat rotation).
 - Optimizes winrate of hero (as even team 0&2) vs heuristic_v0.
 - Keeps runtime modest; evaluation is fast.
+- --workers N runs all evaluations (candidates, baseline, validation) on one pool of
+  N processes; results do not depend on N (every candidate sees the same seeded deals).
 """
 
 import argparse
@@ -16,45 +18,67 @@ import dataclasses
 import math
 import random
 import time
-from typing import Dict, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Tuple
 
 from .agent import Agent as HeuristicV0
-from .env_maraffa import MaraffaEnv
-from .match import play_hand_from_state
 from .hero import HeroAgent
-
-
-def paired_winrate(agent_even, agent_odd, *, deals: int, seed: int) -> Tuple[float, Tuple[int, int, int]]:
-    env = MaraffaEnv(seed=seed)
+from .rollout import DEFAULT_WORKERS, resolve_workers, run_paired_batch
+
+
+def paired_winrate(
+    agent_even,
+    agent_odd,
+    *,
+    deals: int,
+    seed: int,
+    workers: int = DEFAULT_WORKERS,
+    executor: Executor | None = None,
+) -> Tuple[float, Tuple[int, int, int]]:
+    """Paired winrate of agent_even over deals seed..seed+deals-1.
+
+    `workers` and `executor` are passed to rollout.run_paired_batch; the result
+    does not depend on them.
+    """
     w = d = l = 0
-
-    for i in range(int(deals)):
-        hands, declarer = MaraffaEnv.deal_from_seed(int(seed) + i)
-
-        env.reset_from(hands, declarer)
-        p0, p1 = play_hand_from_state(env, agent_even, agent_odd)
-        if p0 > p1:
-            w += 1
-        elif p1 > p0:
-            l += 1
-        else:
-            d += 1
-
-        hands2 = [hands[(p - 1) & 3] for p in range(4)]
-        env.reset_from(hands2, (declarer + 1) & 3)
-        p0, p1 = play_hand_from_state(env, agent_even, agent_odd)
-        if p0 > p1:
-            w += 1
-        elif p1 > p0:
-            l += 1
-        else:
-            d += 1
+    pairs = run_paired_batch(agent_even, agent_odd, n_deals=deals, seed=seed, n_workers=workers, executor=executor)
+    for pair in pairs:
+        for p0, p1 in pair:
+            if p0 > p1:
+                w += 1
+            elif p1 > p0:
+                l += 1
+            else:
+                d += 1
 
     n = int(deals) * 2
     wr = (w + 0.5 * d) / max(1, n)
     return wr, (w, d, l)
 
 
+def _eval_candidate(pmap: Dict[str, float], deals: int, seed: int) -> float:
+    """Train winrate of HeroAgent(**pmap) vs heuristic_v0 (top-level so pool workers can run it)."""
+    wr, _ = paired_winrate(HeroAgent(**pmap), HeuristicV0(), deals=deals, seed=seed)
+    return wr
+
+
+def eval_candidates(
+    cand_params: List[Dict[str, float]], *, deals: int, seed: int, pool: Executor | None = None
+) -> List[float]:
+    """Winrates of all candidates on the same deal stream, in order; parallel when `pool` is given."""
+    if pool is None:
+        # Serial: one agent pair for all candidates; weights are overwritten in place.
+        hero, v0 = HeroAgent(), HeuristicV0()
+        wrs = []
+        for pmap in cand_params:
+            hero.set_weights(pmap)
+            wr, _ = paired_winrate(hero, v0, deals=deals, seed=seed)
+            wrs.append(wr)
+        return wrs
+    n = len(cand_params)
+    return list(pool.map(_eval_candidate, cand_params, [deals] * n, [seed] * n))
+
+
 def get_base_params() -> Dict[str, float]:
     h = HeroAgent()
     d = dataclasses.asdict(h)
@@ -96,12 +120,17 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--seed", type=int, default=7000)
     p.add_argument("--sigma", type=float, default=0.25)
     p.add_argument("--patience", type=int, default=30, help="Stop after this many iterations without improvement.")
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Processes for candidate and baseline/validation evaluation (1 = serial, < 1 = one per CPU).",
+    )
     return p.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
-
+def tune(args: argparse.Namespace, *, pool: Executor | None, workers: int) -> Dict[str, float]:
+    """Run the tuning loop; returns the best params. `pool` (sized `workers`) is reused by every evaluation."""
     rng = random.Random(args.seed)
     base = get_base_params()
 
@@ -117,8 +146,8 @@ def main() -> None:
     # Initial baseline (iteration 0 seeds)
     seed0_train = int(args.seed) + 123
     seed0_val = int(args.seed) + 999
-    best_train, _ = paired_winrate(HeroAgent(**best), v0, deals=args.deals, seed=seed0_train)
-    best_val, _ = paired_winrate(HeroAgent(**best), v0, deals=args.deals, seed=seed0_val)
+    best_train, _ = paired_winrate(HeroAgent(**best), v0, deals=args.deals, seed=seed0_train, workers=workers, executor=pool)
+    best_val, _ = paired_winrate(HeroAgent(**best), v0, deals=args.deals, seed=seed0_val, workers=workers, executor=pool)
 
     print(f"base train_wr={best_train:.4f} val_wr={best_val:.4f} sigma={sigma:.3f} deals={args.deals} pop={args.pop}")
 
@@ -132,11 +161,8 @@ def main() -> None:
         cand_params = [propose(rng, best, sigma) for _ in range(int(args.pop))]
         cand_params.append(best)  # include current best
 
-        scored = []
-        for j, pmap in enumerate(cand_params):
-            hero = HeroAgent(**pmap)
-            wr, _ = paired_winrate(hero, v0, deals=args.deals, seed=train_seed)
-            scored.append((wr, j, pmap))
+        wrs = eval_candidates(cand_params, deals=args.deals, seed=train_seed, pool=pool)
+        scored = [(wr, j, pmap) for j, (wr, pmap) in enumerate(zip(wrs, cand_params))]
 
         scored.sort(reverse=True, key=lambda x: x[0])
         top_wr, _, top = scored[0]
@@ -145,7 +171,7 @@ def main() -> None:
         if improved:
             best = dict(top)
             best_train = float(top_wr)
-            best_val, _ = paired_winrate(HeroAgent(**best), v0, deals=args.deals, seed=val_seed)
+            best_val, _ = paired_winrate(HeroAgent(**best), v0, deals=args.deals, seed=val_seed, workers=workers, executor=pool)
             stale = 0
         else:
             stale += 1
@@ -167,6 +193,20 @@ def main() -> None:
         if stale >= int(args.patience):
             break
 
+    return best
+
+
+def main() -> None:
+    args = parse_args()
+    workers = resolve_workers(args.workers)
+    if workers == 1:
+        best = tune(args, pool=None, workers=1)
+    else:
+        # One pool for the whole run: candidate batches and the baseline/validation
+        # deals all go through it.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            best = tune(args, pool=pool, workers=workers)
+
     print("---")
     print("BEST PARAMS:")
     for k in sorted(best.keys()):